@@ -8,68 +8,122 @@ import time
 import string
 from dataclasses import dataclass
 
-@dataclass
+# Kernel send/receive buffer size, matching the server
+SOCK_BUF_SIZE = 1 << 20
+
+# Max buffers per sendmsg() call (Linux IOV_MAX); same as server.py
+IOV_MAX = 1024
+
+
+@dataclass(slots=True)
 class Metrics:
-    lock: threading.Lock
+    """Per-client-thread counters; each thread owns one, so no lock is needed."""
     sent: int = 0
     recv: int = 0
     ok: int = 0
     err: int = 0
 
 
-def generate_random_number(low, high):
-    return random.randint(low, high)
-
-
-def generate_random_string(length):
-    # Define the character pool: lowercase, uppercase, and digits
-    characters = string.ascii_letters + string.digits
-    # Use random.choices to select characters with replacement
-    random_string = ''.join(random.choices(characters, k=length))
-    return random_string
+# Value pools for request generation
+ALPHABET = (string.ascii_letters + string.digits).encode()
+SLEEP_MS = range(100, 1001)
+ECHO_LEN = range(1, 101)
 
 
-def make_request(mix: str) -> str:
+def build_batch(mix: str, n: int) -> list[bytes]:
     """
+    Build `n` newline-terminated requests, one bytes object per request.
+    All random values for the batch are drawn with one random.choices()
+    call each instead of several calls per request.
     mix:
-      - sleep: mostly SLEEP
-      - cpu: mostly FIB
-      - balanced: mixed
+      - sleep: only SLEEP
+      - echo: only ECHO
+      - balanced (and any other value): 50/50 SLEEP and ECHO
     """
     if mix == "sleep":
-        ms = generate_random_number(100, 1000)
-        return f"SLEEP {ms}\n"
+        kinds = [True] * n
     elif mix == "echo":
-        msg = generate_random_string(generate_random_number(1, 100))
-        return f"ECHO {msg}\n"
+        kinds = [False] * n
     else:
-        choice = random.random()
-        if choice < 0.50:
-            ms = generate_random_number(100, 1000)
-            return f"SLEEP {ms}\n"
+        kinds = random.choices((True, False), k=n)
+
+    n_sleep = sum(kinds)
+    sleeps = iter(random.choices(SLEEP_MS, k=n_sleep))
+    lengths = random.choices(ECHO_LEN, k=n - n_sleep)
+    chars = bytes(random.choices(ALPHABET, k=sum(lengths)))
+
+    lines = []
+    echoes = iter(lengths)
+    pos = 0
+    for is_sleep in kinds:
+        if is_sleep:
+            lines.append(b"SLEEP %d\n" % next(sleeps))
         else:
-            msg = generate_random_string(generate_random_number(1, 100))
-            return f"ECHO {msg}\n"
+            end = pos + next(echoes)
+            lines.append(b"ECHO " + chars[pos:end] + b"\n")
+            pos = end
+    return lines
 
 
-def recv_lines(sock: socket.socket, expected: int, timeout: float, logger: logging.Logger) -> list[str]:
+def send_chunks(sock: socket.socket, chunks: list[bytes]) -> None:
+    """
+    Send all chunks with gather writes (sendmsg) instead of joining them
+    into one payload first. Falls back to sendall() without sendmsg().
+    Kept in sync with server.py's sendmsg_some() (which stops instead of
+    blocking when the socket is full); duplicated so each script stays standalone.
+    """
+    if not hasattr(sock, "sendmsg"):
+        sock.sendall(b"".join(chunks))
+        return
+    bufs = [memoryview(c) for c in chunks]
+    while bufs:
+        sent = sock.sendmsg(bufs[:IOV_MAX])
+        # Drop fully sent buffers, trim a partially sent one
+        i = 0
+        while i < len(bufs) and sent >= len(bufs[i]):
+            sent -= len(bufs[i])
+            i += 1
+        del bufs[:i]
+        if sent:
+            bufs[0] = bufs[0][sent:]
+
+
+def recv_lines(sock: socket.socket, expected: int, timeout: float, logger: logging.Logger) -> list[bytes]:
     """
     Receive up to `expected` newline-terminated responses.
+    Data is received in place into one preallocated buffer (recv_into), so
+    nothing already received is copied again on each recv.
     """
     sock.settimeout(timeout)
-    buf = b""
-    lines: list[str] = []
+    buf = bytearray(max(4096, expected * 128))
+    mv = memoryview(buf)
+    start = 0  # first byte of the current (incomplete) line
+    pos = 0    # end of received data
+    lines: list[bytes] = []
 
     while len(lines) < expected:
+        if pos == len(buf):
+            if start:
+                # Move the partial line to the front to reuse the space
+                tail = pos - start
+                mv[:tail] = bytes(mv[start:pos])
+                start, pos = 0, tail
+            else:
+                # A single line fills the buffer: grow it
+                mv.release()
+                buf.extend(bytes(len(buf)))
+                mv = memoryview(buf)
         try:
-            data = sock.recv(4096)
-            if not data:
+            n = sock.recv_into(mv[pos:])
+            if not n:
                 logger.warning("server closed connection while receiving")
                 break
-            buf += data
-            while b"\n" in buf and len(lines) < expected:
-                raw, buf = buf.split(b"\n", 1)
-                lines.append(raw.decode("utf-8", errors="replace"))
+            pos += n
+            while len(lines) < expected and (i := buf.find(b"\n", start, pos)) != -1:
+                lines.append(bytes(mv[start:i]))
+                start = i + 1
+            if start == pos:
+                start = pos = 0
         except socket.timeout:
             logger.warning("recv timeout after %d/%d responses", len(lines), expected)
             break
@@ -88,10 +142,17 @@ def client_thread(cid: int, host: str, port: int, requests: int, mix: str, max_i
     """
     logger = logging.getLogger(f"client-{cid}")
     logger.setLevel(log_level)
+    # Resolve per-batch log calls once: disabled levels become None so the
+    # hot loop skips the call (and its argument tuple) entirely
+    _debug = logger.debug if logger.isEnabledFor(logging.DEBUG) else None
+    _info = logger.info if logger.isEnabledFor(logging.INFO) else None
 
     sock = None
     try:
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # Before connect() so the larger window is negotiated in the handshake
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCK_BUF_SIZE)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCK_BUF_SIZE)
         sock.connect((host, port))
         sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
         logger.info("connected to %s:%d", host, port)
@@ -103,27 +164,24 @@ def client_thread(cid: int, host: str, port: int, requests: int, mix: str, max_i
             batch = min(max_inflight, remaining)
             batch_id += 1
 
-            payload = "".join(make_request(mix) for _ in range(batch))
-            sock.sendall(payload.encode("utf-8"))
-            logger.debug("sent batch %d (%d requests)", batch_id, batch)
+            send_chunks(sock, build_batch(mix, batch))
+            if _debug:
+                _debug("sent batch %d (%d requests)", batch_id, batch)
 
-            with metrics.lock:
-                metrics.sent += batch
+            metrics.sent += batch
 
             lines = recv_lines(sock, expected=batch, timeout=recv_timeout, logger=logger)
 
-            with metrics.lock:
-                metrics.recv += len(lines)
-                for s in lines:
-                    if s.startswith("OK"):
-                        metrics.ok += 1
-                    else:
-                        metrics.err += 1
+            ok = sum(line[:2] == b"OK" for line in lines)
+            metrics.recv += len(lines)
+            metrics.ok += ok
+            metrics.err += len(lines) - ok
 
-            logger.info(
-                "received batch %d: %d/%d responses",
-                batch_id, len(lines), batch
-            )
+            if _info:
+                _info(
+                    "received batch %d: %d/%d responses",
+                    batch_id, len(lines), batch
+                )
 
             if len(lines) < batch:
                 logger.warning(
@@ -169,12 +227,12 @@ def main():
         format="%(asctime)s [%(levelname)s] [%(threadName)s] %(name)s: %(message)s",
     )
 
-    metrics = Metrics(lock=threading.Lock())
+    per_client = [Metrics() for _ in range(args.clients)]
     threads = []
     start = time.time()
 
     for i in range(args.clients):
-        t = threading.Thread(target=client_thread, args=(i, args.host, args.port, args.requests, args.mix, args.max_inflight, args.recv_timeout, metrics, getattr(logging, args.log_level)))
+        t = threading.Thread(target=client_thread, args=(i, args.host, args.port, args.requests, args.mix, args.max_inflight, args.recv_timeout, per_client[i], getattr(logging, args.log_level)))
         t.start()
         threads.append(t)
 
@@ -182,11 +240,10 @@ def main():
         t.join()
 
     elapsed = time.time() - start
-    with metrics.lock:
-        sent = metrics.sent
-        recv = metrics.recv
-        ok = metrics.ok
-        err = metrics.err
+    sent = sum(m.sent for m in per_client)
+    recv = sum(m.recv for m in per_client)
+    ok = sum(m.ok for m in per_client)
+    err = sum(m.err for m in per_client)
 
     rps = ok / elapsed if elapsed > 0 else 0.0
     logging.info(
@@ -1,56 +1,244 @@
 #!/usr/bin/env python3
 import argparse
+import heapq
+import itertools
+import os
 import queue
+import selectors
 import socket
 import threading
 import time
-from dataclasses import dataclass
-from typing import Optional, Tuple
+from dataclasses import dataclass, field
+from typing import Callable, Optional, Tuple, Union
 
 # ----------------------------
 # Request/Response protocol
 # ----------------------------
 
-@dataclass
-class Task:
-    conn: socket.socket
+# Max buffers per sendmsg() call (Linux IOV_MAX); same as client.py
+IOV_MAX = 1024
+
+# Kernel send/receive buffer size for client connections
+SOCK_BUF_SIZE = 1 << 20
+
+# How long a request may wait for a queue slot before ERR server busy
+ADMIT_TIMEOUT_NS = 1_000_000_000
+
+# Unwritten replies a connection may owe while its socket is full before
+# it stops being read; bounds each client on its own, outside the queue
+CONN_MAX_UNWRITTEN = 64
+
+
+def sendmsg_some(sock: socket.socket, bufs: list[memoryview]) -> None:
+    """
+    Write from the front of `bufs` with gather-write syscalls until all of it
+    is sent or the non-blocking socket is full, dropping what was written
+    from `bufs`. Falls back to send() where sendmsg() is unavailable.
+    Kept in sync with client.py's send_chunks() (which blocks instead);
+    duplicated so each script stays standalone.
+    """
+    sendmsg = getattr(sock, "sendmsg", None)
+    while bufs:
+        try:
+            sent = sendmsg(bufs[:IOV_MAX]) if sendmsg else sock.send(bufs[0])
+        except BlockingIOError:
+            return  # socket buffer full; the rest waits for write readiness
+        # Drop fully written buffers, trim a partially written one
+        i = 0
+        while i < len(bufs) and sent >= len(bufs[i]):
+            sent -= len(bufs[i])
+            i += 1
+        del bufs[:i]
+        if sent:
+            bufs[0] = bufs[0][sent:]
+
+
+@dataclass(slots=True)
+class ConnState:
+    sock: socket.socket
     addr: Tuple[str, int]
-    line: str
-    enqueued_at: float  # perf timing
+    lock: threading.Lock  # guards pending/sending/busy for this connection only
+    rbuf: bytearray = field(default_factory=bytearray)  # bytes read but not yet split into lines
+    pending: list[bytes] = field(default_factory=list)  # responses waiting to be written
+    pending_tasks: list["Task"] = field(default_factory=list)  # tasks whose replies are in pending
+    out: list[memoryview] = field(default_factory=list)  # unwritten rest of the batch being flushed
+    out_tasks: list["Task"] = field(default_factory=list)  # tasks whose replies are in out
+    sending: bool = False  # a thread is flushing, or the flush is waiting for write readiness
+    dead: bool = False  # set once the connection is closed or a send failed
+    wait_until_ns: int = 0  # admission deadline of the first buffered line (0: not waiting)
+    busy: int = 0  # ERR server busy replies owed but not yet sent
+    sleeping: int = 0  # SLEEP replies in the server's timer heap (guarded by its timer lock)
+    listener_id: int = 0  # listener whose selector loop owns this connection
+    # Selector registration, only touched by the owning listener's thread
+    events: int = 0  # events currently registered (0: not registered)
+    parked: bool = False  # waiting for a queue slot: not read
+    write_blocked: bool = False  # watched for write readiness to resume a flush
+
+    def unwritten(self) -> int:
+        """Replies (including busy ones) queued but not yet written; read without the lock."""
+        return len(self.out_tasks) + len(self.pending_tasks) + self.busy
+
+    def add_busy(self) -> bool:
+        """Owe one more busy reply; True if none were owed before."""
+        with self.lock:
+            self.busy += 1
+            return self.busy == 1
+
+    def send(self, data: Optional[bytes], task: Optional["Task"], done: Callable[[list, bool], None]) -> bool:
+        """
+        Queue a response and flush it (userspace cork).
+        If another thread is already flushing this connection, it picks up
+        the new data in its next sendmsg() and this call returns at once, so
+        responses that finish close together go out in one syscall. Owed busy
+        replies ride along with every flush; pass data=None to send only those.
+
+        `task` (None for busy replies) is passed to done(tasks, written) by
+        whichever thread ends up writing it, once per batch. Its queue slot
+        is already free by then; a client that stops reading is throttled
+        on its own through unwritten() instead.
+
+        Never blocks: see flush() for the return value.
+        """
+        if self.dead:
+            if task is not None:
+                done([task], False)
+            return False
+        with self.lock:
+            if data is not None:
+                self.pending.append(data)
+            if task is not None:
+                self.pending_tasks.append(task)
+            if self.sending:
+                return False
+            self.sending = True
+        return self.flush(done)
+
+    def flush(self, done: Callable[[list, bool], None]) -> bool:
+        """
+        Write replies until none are left (returns False) or the socket is
+        full (returns True). In that case the flush stays claimed, so other
+        send() calls only queue their data, and the caller must have the
+        connection watched for write readiness, then call flush() again.
+        Only the thread holding the claim (`sending`) may call this.
+        """
+        while not self.dead:
+            if not self.out:
+                with self.lock:
+                    batch, tasks = self.pending, self.pending_tasks
+                    if self.busy:
+                        batch.append(_ERR_BUSY * self.busy)
+                        self.busy = 0
+                    if not batch:
+                        self.sending = False
+                        return False
+                    self.pending, self.pending_tasks = [], []
+                self.out = [memoryview(b) for b in batch]
+                self.out_tasks = tasks
+            try:
+                sendmsg_some(self.sock, self.out)
+            except OSError:
+                break
+            if self.out:
+                return True
+            tasks, self.out_tasks = self.out_tasks, []
+            done(tasks, True)
+        # Every later send would fail the same way: mark the connection
+        # dead so queued work for it is dropped instead of executed
+        self.dead = True
+        with self.lock:
+            tasks = self.out_tasks + self.pending_tasks
+            self.out, self.out_tasks = [], []
+            self.pending.clear()
+            self.pending_tasks = []
+            self.sending = False
+        done(tasks, False)
+        return False
+
+
+# Task kinds: what a worker does with a task it takes off its queue
+REQUEST = 0  # execute `line` and send the reply
+REPLY = 1  # send the ready reply in `resp` (a due SLEEP)
+BUSY = 2  # flush the busy replies owed to the connection (holds no slot)
+FLUSH = 3  # resume a flush once the socket is writable, or drop it if closed (no slot)
+
+
+@dataclass(slots=True)
+class Task:
+    conn_state: Optional[ConnState]  # None marks the shutdown sentinel
+    line: bytes  # raw request line, never decoded
+    enqueued_at_ns: int  # time.monotonic_ns() at enqueue
+    kind: int = REQUEST
+    resp: Optional[bytes] = None  # reply to send for a REPLY task
+    queue_id: int = -1  # shard whose queue slot this task holds (-1: none)
+
+
+# Pre-encoded response pieces; every response is a complete line
+_OK = b"OK "
+_NL = b"\n"
+_ERR_EMPTY = b"ERR empty request\n"
+_ERR_SLEEP_RANGE = b"ERR SLEEP ms must be 0..10000\n"
+_ERR_INVALID = b"ERR invalid argument\n"
+_ERR_UNKNOWN = b"ERR unknown op "
+_ERR_BUSY = b"ERR server busy\n"
+
 
+@dataclass(slots=True)
+class Delayed:
+    """A response that must only be sent once `delay_ns` nanoseconds have passed."""
+    delay_ns: int
+    resp: bytes
 
-def parse_and_execute(line: str) -> str:
+
+def _do_sleep(arg: bytes) -> Union[bytes, Delayed]:
+    ms = int(arg)
+    if ms < 0 or ms > 10_000:
+        return _ERR_SLEEP_RANGE
+    # Don't block a worker: the timer thread hands the reply back to a worker once it is due
+    return Delayed(delay_ns=ms * 1_000_000, resp=b"OK %d\n" % ms)
+
+
+def _do_echo(arg: bytes) -> bytes:
+    return _OK + arg + _NL
+
+
+# Op name -> handler(arg) returning the response line (or a Delayed one)
+HANDLERS = {
+    b"SLEEP": _do_sleep,
+    b"ECHO": _do_echo,
+}
+
+
+def parse_and_execute(line: bytes) -> Union[bytes, Delayed]:
     """
-    Parse a single request line and return a response line (without trailing newline).
+    Parse a single request line and return a response line (with trailing newline),
+    or a Delayed response for requests that wait before answering (SLEEP).
+    The protocol is ASCII, so the line is parsed as raw bytes with no decode/encode.
     Supported:
       SLEEP ms
-      FACT n
-      FIB n
       ECHO text...
     """
     line = line.strip()
     if not line:
-        return "ERR empty request"
-
-    parts = line.split(" ", 1)
-    op = parts[0].upper()
-    arg = parts[1] if len(parts) > 1 else ""
+        return _ERR_EMPTY
+
+    sp = line.find(b" ")
+    if sp == -1:
+        op, arg = line, b""
+    else:
+        op, arg = line[:sp], line[sp + 1:]
+
+    # Clients send uppercase ops, so upper() is only paid on a miss
+    fn = HANDLERS.get(op)
+    if fn is None:
+        op = op.upper()
+        fn = HANDLERS.get(op)
+        if fn is None:
+            return _ERR_UNKNOWN + op + _NL
 
     try:
-        if op == "SLEEP":
-            ms = int(arg)
-            if ms < 0 or ms > 10_000:
-                return "ERR SLEEP ms must be 0..10000"
-            time.sleep(ms / 1000.0)
-            return f"OK {ms}"
-
-        elif op == "ECHO":
-            return f"OK {arg}"
-
-        else:
-            return f"ERR unknown op {op}"
+        return fn(arg)
     except ValueError:
-        return "ERR invalid argument"
+        return _ERR_INVALID
 
 
 # ----------------------------
@@ -58,28 +246,63 @@ def parse_and_execute(line: str) -> str:
 # ----------------------------
 
 class ThreadPoolServer:
-    def __init__(self, host: str, port: int, workers: int, queue_size: int, reject_when_full: bool):
+    def __init__(self, host: str, port: int, workers: int, queue_size: int, reject_when_full: bool, listeners: int = 1):
         self.host = host
         self.port = port
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
         self.workers = workers
+        # Extra listening sockets share the port through SO_REUSEPORT
+        if listeners < 1:
+            raise ValueError("listeners must be at least 1")
+        if listeners > 1 and not hasattr(socket, "SO_REUSEPORT"):
+            print(f"[warn] SO_REUSEPORT is not available; using 1 listener instead of {listeners}")
+            listeners = 1
+        self.listeners = listeners
         self.queue_size = queue_size
         self.reject_when_full = reject_when_full
 
-        self.task_q: "queue.Queue[Task]" = queue.Queue(maxsize=queue_size)
+        # One unbounded SimpleQueue per worker, fed round-robin, so put/get
+        # never contend on a single queue lock. Each shard is bounded by a
+        # semaphore: acquired before put, released once the reply is written.
+        self.task_qs: "list[queue.SimpleQueue[Task]]" = [queue.SimpleQueue() for _ in range(workers)]
+        # 1 while a worker is handling a task
+        self._working = [0] * workers
+        # queue_size is split exactly; the first `extra` shards take one more
+        shard_size, extra = divmod(queue_size, workers)
+        self._slots = [threading.Semaphore(shard_size + (i < extra)) for i in range(workers)]
 
         self._stop = threading.Event()
+        # Self-pipe: stop() writes a byte (never read back) so every selector
+        # loop wakes up without having to poll self._stop on a timeout
+        self._stop_r, self._stop_w = os.pipe()
+        # Per-listener wake pipe: written when a queue slot is freed while
+        # that listener has connections waiting for one
+        self._wake_fds = [os.pipe() for _ in range(self.listeners)]
+        for _, w in self._wake_fds:
+            os.set_blocking(w, False)
+        self._readers_waiting = [False] * self.listeners
+        # Per-listener connections whose socket filled up mid-flush, for that
+        # listener's selector to watch for write readiness (wake pipe signals)
+        self._write_waits: "list[queue.SimpleQueue[ConnState]]" = [queue.SimpleQueue() for _ in range(self.listeners)]
         self._threads: list[threading.Thread] = []
-        self._accept_thread: Optional[threading.Thread] = None
-
-        # Per-connection locks for safe concurrent writes
-        self._conn_locks: dict[socket.socket, threading.Lock] = {}
-        self._conn_locks_lock = threading.Lock()
-
-        # Stats
-        self._lock = threading.Lock()
-        self._processed = 0
-        self._total_latency = 0.0  # seconds
-        self._start_time = time.time()
+        self._accept_threads: list[threading.Thread] = []
+
+        # Pending SLEEP replies: heap of (wake_at_ns, seq, task). A single
+        # timer thread hands due tasks to the shortest worker queue instead of
+        # parking workers; it never touches a socket itself.
+        self._timer_heap: list[tuple] = []
+        self._timer_cv = threading.Condition()
+        self._timer_seq = itertools.count()
+        self._timer_purge = False  # a connection with entries in the heap was closed
+
+        # Stats: one [processed, total_latency_ns] shard per worker. Each shard
+        # has a single writer, so it is updated without taking a lock; only
+        # _stats_loop reads across shards.
+        self._shards: list[list[int]] = [[0, 0] for _ in range(workers)]
+        self._start_ns = time.monotonic_ns()
 
     def start(self) -> None:
         """
@@ -91,9 +314,17 @@ class ThreadPoolServer:
             self._threads.append(t)
             t.start()
 
+        t = threading.Thread(target=self._timer_loop, daemon=True)
+        self._threads.append(t)
+        t.start()
+
         # TODO(2): start accept loop in a thread (self._accept_loop)
-        self._accept_thread = threading.Thread(target=self._accept_loop, daemon=True)
-        self._accept_thread.start()
+        # One accept/read loop per listening socket; the kernel spreads
+        # incoming connections across them
+        for i in range(self.listeners):
+            t = threading.Thread(target=self._accept_loop, args=(i,), daemon=True)
+            self._accept_threads.append(t)
+            t.start()
 
         # TODO(3): start stats reporter thread (self._stats_loop)
         t = threading.Thread(target=self._stats_loop, daemon=True)
@@ -113,152 +344,453 @@ class ThreadPoolServer:
         Signal stop and close server.
         """
         self._stop.set()
+        os.write(self._stop_w, b"x")
 
         # Wake workers blocked on queue.get()
-        for _ in range(self.workers):
-            try:
-                self.task_q.put_nowait(Task(conn=None, addr=("0.0.0.0", 0), line="", enqueued_at=time.time()))  # type: ignore
-            except queue.Full:
-                pass
+        for q in self.task_qs:
+            q.put(Task(conn_state=None, line=b"", enqueued_at_ns=0))
+        with self._timer_cv:
+            self._timer_cv.notify()
 
         for t in self._threads:
             t.join(timeout=2.0)
-        if self._accept_thread:
-            self._accept_thread.join(timeout=2.0)
+        for t in self._accept_threads:
+            t.join(timeout=2.0)
+        # A thread still running may yet write to (or select on) these fds;
+        # leave them open rather than let it hit a closed or reused number
+        if any(t.is_alive() for t in self._threads + self._accept_threads):
+            return
+        os.close(self._stop_r)
+        os.close(self._stop_w)
+        for r, w in self._wake_fds:
+            os.close(r)
+            os.close(w)
 
     def _stats_loop(self) -> None:
         while not self._stop.is_set():
             time.sleep(2.0)
-            with self._lock:
-                processed = self._processed
-                avg_ms = (self._total_latency / processed * 1000.0) if processed else 0.0
-            qlen = self.task_q.qsize()
-            elapsed = time.time() - self._start_time
+            processed = sum(shard[0] for shard in self._shards)
+            total_latency_ns = sum(shard[1] for shard in self._shards)
+            avg_ms = (total_latency_ns / processed / 1e6) if processed else 0.0
+            qlen = sum(q.qsize() for q in self.task_qs)
+            sleeping = len(self._timer_heap)
+            elapsed = (time.monotonic_ns() - self._start_ns) / 1e9
             rps = processed / elapsed if elapsed > 0 else 0.0
-            print(f"[stats] processed={processed} avg_latency_ms={avg_ms:.2f} qlen={qlen} rps={rps:.2f}")
+            print(f"[stats] processed={processed} avg_latency_ms={avg_ms:.2f} qlen={qlen} sleeping={sleeping} rps={rps:.2f}")
+
+    def _timer_loop(self) -> None:
+        """
+        Timer thread: requeue delayed (SLEEP) tasks once they are due.
+        Sending stays with the workers; the timer never touches a socket.
+        """
+        heap = self._timer_heap
+        while True:
+            with self._timer_cv:
+                while not self._stop.is_set():
+                    now = time.monotonic_ns()
+                    if self._timer_purge or (heap and heap[0][0] <= now):
+                        break
+                    self._timer_cv.wait((heap[0][0] - now) / 1e9 if heap else None)
+                else:
+                    return
+                dropped = []
+                if self._timer_purge:
+                    # Cancel the SLEEPs of closed connections now rather
+                    # than keep their queue slots until they come due
+                    self._timer_purge = False
+                    dropped = [task for _, _, task in heap if task.conn_state.dead]
+                    if dropped:
+                        heap[:] = [entry for entry in heap if not entry[2].conn_state.dead]
+                        heapq.heapify(heap)
+                due = []
+                while heap and heap[0][0] <= now:
+                    due.append(heapq.heappop(heap)[2])
+                for task in dropped + due:
+                    task.conn_state.sleeping -= 1
+            for task in dropped:
+                self._release(self._slots[task.queue_id])
+            # Any worker can send a due reply (its slot stays with task.queue_id),
+            # so spread them over the least loaded workers
+            for task in due:
+                self._shortest_queue().put(task)
+
+    def _schedule(self, delay_ns: int, task: Task) -> None:
+        """
+        Hand a REPLY task to the timer thread; after `delay_ns`
+        nanoseconds it goes back on a worker queue to be sent.
+        The task keeps its queue slot until the reply is handed to its connection.
+        """
+        entry = (time.monotonic_ns() + delay_ns, next(self._timer_seq), task)
+        with self._timer_cv:
+            # Checked under the lock so _cancel_sleeps() can't miss this entry
+            if task.conn_state.dead:
+                self._release(self._slots[task.queue_id])
+                return
+            task.conn_state.sleeping += 1
+            heapq.heappush(self._timer_heap, entry)
+            # Only the earliest deadline can shorten the timer's wait
+            if self._timer_heap[0] is entry:
+                self._timer_cv.notify()
+
+    def _cancel_sleeps(self, conn_state: ConnState) -> None:
+        """
+        Called once a connection is marked dead: have the timer drop its
+        pending SLEEP replies and free their queue slots right away.
+        """
+        with self._timer_cv:
+            if conn_state.sleeping:
+                self._timer_purge = True
+                self._timer_cv.notify()
 
-    def _accept_loop(self) -> None:
+    def _finished(self, tasks: list[Task], written: bool, shard: list[int]) -> None:
+        """
+        Called by the worker that wrote (or dropped) a batch of replies:
+        record their latency in that worker's `shard`. Replies for a
+        connection that has gone away are dropped uncounted.
+        """
+        if written:
+            now = time.monotonic_ns()
+            for task in tasks:
+                shard[0] += 1
+                shard[1] += now - task.enqueued_at_ns
+
+    def _shortest_queue(self) -> "queue.SimpleQueue[Task]":
+        """
+        The worker queue with the least work ahead of it, counting the task
+        its worker is on, so an idle worker wins over a busy one.
+        """
+        working = self._working
+        i = min(range(self.workers), key=lambda i: self.task_qs[i].qsize() + working[i])
+        return self.task_qs[i]
+
+    def _release(self, slots: threading.Semaphore) -> None:
+        """
+        Free a queue slot and wake any listener holding connections that
+        are waiting for one.
+        """
+        slots.release()
+        waiting = self._readers_waiting
+        if True in waiting:
+            for i, flag in enumerate(waiting):
+                if flag:
+                    waiting[i] = False
+                    self._wake(i)
+
+    def _wake(self, listener_id: int) -> None:
+        """Wake a listener's selector loop."""
+        try:
+            os.write(self._wake_fds[listener_id][1], b"x")
+        except BlockingIOError:
+            pass  # pipe already full of unread wakeups
+
+    def _watch_write(self, conn_state: ConnState) -> None:
+        """
+        Called by a worker whose flush filled the socket: the connection's
+        listener will queue a FLUSH task once it is writable again, so no
+        worker ever blocks on a client that stops reading.
+        """
+        self._write_waits[conn_state.listener_id].put(conn_state)
+        self._wake(conn_state.listener_id)
+
+    def _accept_loop(self, listener_id: int) -> None:
         """
         Accept clients and read lines, enqueue tasks.
+        Each listener runs one selector loop that multiplexes its listening
+        socket and every client connection it accepted, so no reader thread
+        is spawned per client.
         Each client may send many requests; handle line-by-line.
         """
         # TODO(4): create listening socket, accept connections in a loop until stop
         server_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if self.listeners > 1:
+            server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        # Set on the listener so accepted connections inherit them before the
+        # handshake (a larger window can only be advertised at SYN time)
+        server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCK_BUF_SIZE)
+        server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCK_BUF_SIZE)
         server_sock.bind((self.host, self.port))
         server_sock.listen()
-        server_sock.settimeout(1.0)
-
-        def handle_client(conn: socket.socket, addr: Tuple[str, int]) -> None:
-            """Handle a single client connection."""
+        server_sock.setblocking(False)
+
+        # Each loop dispatches round-robin over all worker shards, starting
+        # at its own offset so listeners don't pile onto the same shard
+        rr = itertools.count(listener_id)
+        n = self.workers
+        working = self._working
+        task_qs = self.task_qs
+        wake_r = self._wake_fds[listener_id][0]
+        write_waits = self._write_waits[listener_id]
+
+        sel = selectors.DefaultSelector()
+        sel.register(server_sock, selectors.EVENT_READ, None)
+        sel.register(self._stop_r, selectors.EVENT_READ, self._stop)
+        sel.register(wake_r, selectors.EVENT_READ, wake_r)
+
+        # Connections waiting for a queue slot, oldest first. They are
+        # not read (see watch()) until they get one.
+        parked: list[ConnState] = []
+
+        def stalled(conn_state: ConnState) -> bool:
+            """True while the client isn't reading the replies it already owes us."""
+            return conn_state.write_blocked and conn_state.unwritten() >= CONN_MAX_UNWRITTEN
+
+        def watch(conn_state: ConnState) -> None:
+            """
+            Register the events a connection needs: write while blocked, and
+            read unless parked or stalled (then TCP holds off its requests).
+            """
+            reading = not conn_state.parked and not stalled(conn_state)
+            events = (selectors.EVENT_READ if reading else 0) | (
+                selectors.EVENT_WRITE if conn_state.write_blocked else 0)
+            if events == conn_state.events:
+                return
+            if not conn_state.events:
+                sel.register(conn_state.sock, events, conn_state)
+            elif events:
+                sel.modify(conn_state.sock, events, conn_state)
+            else:
+                sel.unregister(conn_state.sock)
+            conn_state.events = events
+
+        def flush_task(conn_state: ConnState) -> None:
+            self._shortest_queue().put(Task(conn_state=conn_state, line=b"", enqueued_at_ns=0, kind=FLUSH))
+
+        def close_client(conn_state: ConnState) -> None:
+            conn_state.dead = True
+            self._cancel_sleeps(conn_state)
+            if conn_state.events:
+                sel.unregister(conn_state.sock)
+                conn_state.events = 0
             try:
-                # Set TCP_NODELAY for lower latency
-                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
-                
-                buf = b""
-                while not self._stop.is_set():
-                    try:
-                        data = conn.recv(4096)
-                        if not data:
-                            # Client closed connection
+                conn_state.sock.close()
+            except OSError:
+                pass
+            if conn_state.write_blocked:
+                # Nobody else will flush it: a worker drops its unwritten replies
+                conn_state.write_blocked = False
+                flush_task(conn_state)
+
+        def reject(conn_state: ConnState) -> None:
+            # Replies are for a worker to send; a single queued task carries
+            # every busy reply owed to the connection. It goes to the shortest
+            # queue, so it doesn't wait behind a backlogged worker.
+            if conn_state.add_busy():
+                self._shortest_queue().put(Task(conn_state=conn_state, line=b"", enqueued_at_ns=0, kind=BUSY))
+
+        def admit(conn_state: ConnState) -> bool:
+            """
+            Enqueue the complete lines buffered for a connection without ever
+            blocking. Returns False if a line must wait for a queue slot; it
+            and everything after it stay in the buffer.
+            """
+            buf = conn_state.rbuf
+            start = 0
+            blocked = False
+            while (i := buf.find(b"\n", start)) != -1:
+                # Enqueue task with backpressure handling: try every shard
+                # starting from the round-robin pick before giving up. The
+                # first pass skips busy workers with a backlog, so a slow
+                # task doesn't hold up requests queued behind it. A stalled
+                # connection gets no slot, as if the queue were full.
+                shard = None
+                if not stalled(conn_state):
+                    first = next(rr)
+                    for k in range(first, first + 2 * n):
+                        j = k % n
+                        if k < first + n and working[j] and task_qs[j].qsize():
+                            continue
+                        if self._slots[j].acquire(blocking=False):
+                            shard = j
                             break
-                        
-                        buf += data
-                        
-                        # Process complete lines
-                        while b"\n" in buf:
-                            line_bytes, buf = buf.split(b"\n", 1)
-                            line = line_bytes.decode("utf-8", errors="replace")
-                            
-                            # Create task
-                            task = Task(conn=conn, addr=addr, line=line, enqueued_at=time.time())
-                            
-                            # Enqueue task with backpressure handling
-                            try:
-                                if self.reject_when_full:
-                                    self.task_q.put_nowait(task)
-                                else:
-                                    self.task_q.put(task, block=True, timeout=1.0)
-                            except queue.Full:
-                                # Use connection lock to avoid race with worker threads
-                                with self._conn_locks_lock:
-                                    if conn not in self._conn_locks:
-                                        self._conn_locks[conn] = threading.Lock()
-                                    conn_lock = self._conn_locks[conn]
-                                try:
-                                    with conn_lock:
-                                        conn.sendall(b"ERR server busy\n")
-                                except (BrokenPipeError, ConnectionResetError, OSError):
-                                    return
-                    except (ConnectionResetError, BrokenPipeError, OSError):
+
+                if shard is None and not self.reject_when_full:
+                    # Wait up to ADMIT_TIMEOUT_NS for this line, then reject it
+                    now = time.monotonic_ns()
+                    if not conn_state.wait_until_ns:
+                        conn_state.wait_until_ns = now + ADMIT_TIMEOUT_NS
+                    if now < conn_state.wait_until_ns:
+                        blocked = True
                         break
-            finally:
+                conn_state.wait_until_ns = 0
+
+                if shard is None:
+                    reject(conn_state)
+                else:
+                    line = bytes(buf[start:i])
+                    task_qs[shard].put(
+                        Task(conn_state=conn_state, line=line, enqueued_at_ns=time.monotonic_ns(), queue_id=shard))
+                start = i + 1
+            del buf[:start]
+            return not blocked
+
+        def retry_parked() -> None:
+            still = []
+            for conn_state in parked:
+                if conn_state.dead:
+                    close_client(conn_state)
+                elif admit(conn_state):
+                    conn_state.parked = False
+                    watch(conn_state)
+                else:
+                    still.append(conn_state)
+            parked[:] = still
+
+        def accept_client() -> None:
+            try:
+                conn, addr = server_sock.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            # Non-blocking: workers flush replies with ConnState.send() and
+            # leave the rest to this selector when the socket is full
+            conn.setblocking(False)
+            # Set TCP_NODELAY for lower latency
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            conn_state = ConnState(sock=conn, addr=addr, lock=threading.Lock(), listener_id=listener_id)
+            watch(conn_state)
+
+        def take_write_waits() -> None:
+            """Start watching connections whose flush filled the socket."""
+            while True:
                 try:
-                    conn.close()
-                except OSError:
-                    pass
-                # Clean up connection lock to prevent memory leak
-                with self._conn_locks_lock:
-                    self._conn_locks.pop(conn, None)
-        
+                    conn_state = write_waits.get_nowait()
+                except queue.Empty:
+                    return
+                conn_state.write_blocked = True
+                if conn_state.dead:
+                    close_client(conn_state)  # hands the drop to a worker
+                else:
+                    watch(conn_state)
+
+        def handle_client(conn_state: ConnState) -> None:
+            """Read whatever is ready on a client connection and enqueue complete lines."""
+            conn = conn_state.sock
+            try:
+                data = conn.recv(65536)
+            except BlockingIOError:
+                return
+            except OSError:
+                data = b""
+            if not data:
+                # Client closed connection
+                close_client(conn_state)
+                return
+
+            conn_state.rbuf += data
+            if not admit(conn_state):
+                # Queue full: stop reading this client only, keep serving others
+                conn_state.parked = True
+                parked.append(conn_state)
+            watch(conn_state)
+
         try:
             while not self._stop.is_set():
-                try:
-                    conn, addr = server_sock.accept()
-                except socket.timeout:
-                    continue
-                except OSError:
-                    break
-                
-                t = threading.Thread(target=handle_client, args=(conn, addr), daemon=True)
-                t.start()
+                timeout = None
+                if parked:
+                    # Ask workers to wake us on the next freed slot, then retry
+                    # once so a slot freed just before that isn't missed
+                    self._readers_waiting[listener_id] = True
+                    retry_parked()
+                if parked:
+                    deadline = min(cs.wait_until_ns for cs in parked)
+                    timeout = max(0, deadline - time.monotonic_ns()) / 1e9
+                else:
+                    self._readers_waiting[listener_id] = False
+
+                for key, mask in sel.select(timeout):
+                    if key.data is self._stop:
+                        break
+                    if key.data is wake_r:
+                        os.read(wake_r, 4096)
+                        take_write_waits()
+                    elif key.data is None:
+                        accept_client()
+                    else:
+                        conn_state = key.data
+                        if mask & selectors.EVENT_WRITE:
+                            # Socket drained: a worker resumes the flush
+                            conn_state.write_blocked = False
+                            watch(conn_state)
+                            flush_task(conn_state)
+                        if mask & selectors.EVENT_READ:
+                            handle_client(conn_state)
         finally:
+            for key in list(sel.get_map().values()):
+                if isinstance(key.data, ConnState):
+                    close_client(key.data)
+            for conn_state in parked:
+                close_client(conn_state)
+            sel.close()
             server_sock.close()
 
     def _worker_loop(self, worker_id: int) -> None:
         """
         Worker threads: take tasks from queue and process them.
         """
+        task_q = self.task_qs[worker_id]
+        shard = self._shards[worker_id]
+        working = self._working
+
+        def done(tasks: list[Task], written: bool) -> None:
+            self._finished(tasks, written, shard)
+
         while not self._stop.is_set():
-            task = self.task_q.get()
-            # Sentinel check: we used conn=None to wake workers during shutdown
-            if task.conn is None:
-                self.task_q.task_done()
+            working[worker_id] = 0
+            task = task_q.get()
+            working[worker_id] = 1
+            # Sentinel check: we used conn_state=None to wake workers during shutdown
+            if task.conn_state is None:
                 break
 
-            started = time.time()
-            resp = parse_and_execute(task.line)
-            resp_line = resp + "\n"
+            if task.kind == BUSY:
+                # Rejected requests hold no slot; the flush sends every owed reply
+                if task.conn_state.send(None, None, done):
+                    self._watch_write(task.conn_state)
+                continue
+            if task.kind == FLUSH:
+                if task.conn_state.flush(done):
+                    self._watch_write(task.conn_state)
+                continue
+
+            # Connection already gone: don't execute (or sleep for) its request
+            if task.conn_state.dead:
+                self._release(self._slots[task.queue_id])
+                continue
+
+            if task.kind == REPLY:
+                resp = task.resp
+            else:
+                resp = parse_and_execute(task.line)
+                if isinstance(resp, Delayed):
+                    task.kind = REPLY
+                    task.resp = resp.resp
+                    self._schedule(resp.delay_ns, task)
+                    continue
 
-            try:
-                # TODO(5): send response back to client safely
-                # Get or create per-connection lock
-                with self._conn_locks_lock:
-                    if task.conn not in self._conn_locks:
-                        self._conn_locks[task.conn] = threading.Lock()
-                    conn_lock = self._conn_locks[task.conn]
-                
-                # Use per-connection lock to serialize writes to the same connection
-                with conn_lock:
-                    task.conn.sendall(resp_line.encode("utf-8"))
-            except (BrokenPipeError, ConnectionResetError, OSError):
-                pass
+            # TODO(5): send response back to client safely
+            # The reply is the connection's to write now, so its slot is free
+            # even if the client isn't reading. Writes are serialized per
+            # connection, never across connections.
+            self._release(self._slots[task.queue_id])
+            if task.conn_state.send(resp, task, done):
+                self._watch_write(task.conn_state)
 
-            finished = time.time()
-            with self._lock:
-                self._processed += 1
-                self._total_latency += (finished - task.enqueued_at)
 
-            self.task_q.task_done()
+def positive_int(value: str) -> int:
+    n = int(value)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {n}")
+    return n
 
 
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--host", default="127.0.0.1")
     ap.add_argument("--port", type=int, default=9000)
-    ap.add_argument("--workers", type=int, default=8)
-    ap.add_argument("--queue", type=int, default=500)
+    ap.add_argument("--workers", type=positive_int, default=8)
+    ap.add_argument("--queue", type=positive_int, default=500, help="max requests queued or in progress (including pending SLEEPs)")
     ap.add_argument("--reject-when-full", action="store_true", help="reject with ERR server busy instead of blocking")
+    ap.add_argument("--listeners", type=positive_int, default=1, help="listening sockets (SO_REUSEPORT), each with its own accept/read thread")
     args = ap.parse_args()
 
     srv = ThreadPoolServer(
@@ -267,6 +799,7 @@ def main():
         workers=args.workers,
         queue_size=args.queue,
         reject_when_full=args.reject_when_full,
+        listeners=args.listeners,
     )
 
     try: